@@ -10,18 +10,32 @@ from scripts.utils import load_images
 
 Vector2D = tuple[float, float] | list[float] | list[int] | tuple[int, int]
 # screen constants
-SCREEN_SIZE: tuple[int, int] = (640, 480)
-# display size will be half the screen size to keep the proportions
-DISPLAY_SIZE: tuple[int, int] = (SCREEN_SIZE[0] // 2, SCREEN_SIZE[1] // 2)
+# the resolution we draw the game at (pixel art). The window is opened with the SCALED flag, so SDL picks the window
+# size itself, the largest integer multiple of this size that fits the desktop (e.g. 960x720 on a 1080p screen).
+DISPLAY_SIZE: tuple[int, int] = (320, 240)
 SCROLL_STEP: float = 30
 
-RENDER_SCALE: float = 2.0
 # button constans
 LEFT_CLICK: int = 1
 MOUSE_WHEEL_CLICK: int = 2
 RIGHT_CLICK: int = 3
 MOUSE_WHEEL_SCROLL_UP: int = 4
 MOUSE_WHEEL_SCROLL_DOWN: int = 5
+# how much the mouse wheel moves the tile selection, up goes back and down goes forward
+MOUSE_WHEEL_STEP: dict[int, int] = {MOUSE_WHEEL_SCROLL_UP: -1, MOUSE_WHEEL_SCROLL_DOWN: 1}
+# keyboard keys that move the camera, mapped to their index in the movement list. A dict lookup replaces a chain of
+# ifs in the event loop.
+MOVEMENT_KEYS: dict[int, int] = {pygame.K_LEFT: 0, pygame.K_RIGHT: 1, pygame.K_UP: 2, pygame.K_DOWN: 3}
+SHIFT_KEYS: set[int] = {pygame.K_LSHIFT, pygame.K_RSHIFT}
+# the only events the editor reacts to, the rest (mouse motion, window events, etc) are dropped by SDL before they
+# reach the python event loop
+ALLOWED_EVENTS: list[int] = [
+    pygame.QUIT,
+    pygame.MOUSEBUTTONDOWN,
+    pygame.MOUSEBUTTONUP,
+    pygame.KEYDOWN,
+    pygame.KEYUP,
+]
 
 
 class Editor:
@@ -31,17 +45,22 @@ class Editor:
         """Init the level editor object."""
         # this init the pygame module
         pygame.init()
-        # to init joystick (controller, gamepad)
+        # block every event and then allow only the ones we handle, so the event queue only holds what we need
+        pygame.event.set_blocked(None)
+        pygame.event.set_allowed(ALLOWED_EVENTS)
         # here we give a name to the game
         pygame.display.set_caption("Ninja Game Level Editor")
         # create window (surface is an object representing images in pygame)
         # coordinates system right is positive x and down is positive y
-        self.screen: Surface = pygame.display.set_mode(size=SCREEN_SIZE)
+        # the window surface has the size of the display, the SCALED flag makes SDL scale it up to the window on the
+        # GPU (nearest neighbor, integer factor), so we get the pixel art effect without scaling it ourselves. The
+        # window size is chosen by SDL from the desktop size, not fixed by us.
+        self.screen: Surface = pygame.display.set_mode(size=DISPLAY_SIZE, flags=pygame.SCALED)
         # set custom icons to game
         pygame.display.set_icon(pygame.image.load("data/images/icon.png").convert())
-        # the actual render display, half resolutions of screen
-        # we are going to draw here and the scale it up to the screen, pixel art effect
-        self.display = pygame.Surface(size=DISPLAY_SIZE)  # empty, image of this dimension
+        # the actual render display, half resolutions of screen. With SCALED the window surface already has the
+        # display size, so we draw straight into it instead of drawing somewhere else and copying it every frame.
+        self.display: Surface = self.screen
         self.clock = pygame.time.Clock()
         # to allow the camera to move in every direction
         self.movement: list[bool] = [False, False, False, False]
@@ -60,6 +79,15 @@ class Editor:
 
         # for the tile editor
         self.tile_list: list[str] = list(self.assets)
+        # semi transparent copies of every tile, used to preview the selected tile. We make them once here instead of
+        # copying the image and setting its alpha every frame.
+        self.ghost_assets: dict[str, list[Surface]] = {
+            tile_group_name: [img.copy() for img in self.assets[tile_group_name]] for tile_group_name in self.tile_list
+        }
+        for ghost_images in self.ghost_assets.values():
+            for ghost_img in ghost_images:
+                # Set some transparency to the tile image
+                ghost_img.set_alpha(100)
         self.tile_list_size = len(self.tile_list)
         self.tile_group: int = 0  # which ground are we using
         self.tile_variant: int = 0  # which tile in the group are we using
@@ -67,64 +95,81 @@ class Editor:
         self.clicking: bool = False
         self.right_clicking: bool = False
         self.shift: bool = False
-        self.variants_count = {tile_group_name: len(self.assets[tile_group_name]) for tile_group_name in self.tile_list}
+        # how many variants each tile group has, indexed by the tile group (same order as tile_list)
+        self.variants_count: list[int] = [len(self.assets[tile_group_name]) for tile_group_name in self.tile_list]
 
     def run(self) -> None:  # noqa: C901, PLR0912, PLR0915
         """Run the editor loop."""
+        # bind what the loop uses every frame to local variables once. Local variables are the fastest lookups in
+        # python, attributes and globals need a dictionary lookup each time we use them.
+        display = self.display
+        display_fill = display.fill
+        display_fblits = display.fblits
+        ghost_assets = self.ghost_assets
+        tile_list = self.tile_list
+        tilemap = self.tilemap
+        tile_size = tilemap.tile_size
+        scroll = self.scroll
+        movement = self.movement
+        mouse_get_pos = pygame.mouse.get_pos
+        event_get = pygame.event.get
+        display_update = pygame.display.update
+        clock_tick = self.clock.tick
         while True:
             # Fill the display with black color
-            self.display.fill((0, 0, 0))
+            display_fill((0, 0, 0))
 
-            # Get the current tile image based on the selected tile group and variant
-            current_tile_img: Surface = self.assets[self.tile_list[self.tile_group]][self.tile_variant].copy()
+            # Get the current (semi transparent) tile image based on the selected tile group and variant
+            current_tile_img: Surface = ghost_assets[tile_list[self.tile_group]][self.tile_variant]
 
             # Calculate the scroll offset
-            render_scroll = (int(self.scroll[0]), int(self.scroll[1]))
-
-            # Render the tilemap with the current scroll offset
-            self.tilemap.render(surface=self.display, offset=render_scroll)
-
-            # Get the current mouse position and scale it down by the render scale factor
-            mouse_position: Vector2D = pygame.mouse.get_pos()
-            mouse_position: Vector2D = (mouse_position[0] / RENDER_SCALE, mouse_position[1] / RENDER_SCALE)
+            render_scroll = (int(scroll[0]), int(scroll[1]))
 
-            # Calculate the tile grid position based on the mouse position and scroll offset
-            tile_position: Vector2D = (
-                int((mouse_position[0] + self.scroll[0]) // self.tilemap.tile_size),
-                int((mouse_position[1] + self.scroll[1]) // self.tilemap.tile_size),
+            # Get the tilemap tiles to render with the current scroll offset, we draw them later together with the
+            # preview and the HUD. The tilemap reuses its list between frames, so we add ours to a copy
+            blit_sequence: list[tuple[Surface, Vector2D]] = list(
+                tilemap.blit_sequence(surface=display, offset=render_scroll),
             )
 
-            # Set some transparency to the current tile image
-            current_tile_img.set_alpha(100)
-
-            # Show a preview of where the tile would be placed
-            self.display.blit(
-                source=current_tile_img,
-                # the following math is to render the image from the top left corner of the tile position
-                # taking into accoun the position of the camera (scroll
-                dest=(
-                    tile_position[0] * self.tilemap.tile_size - self.scroll[0],
-                    tile_position[1] * self.tilemap.tile_size - self.scroll[1],
-                ),
+            # Get the current mouse position, with the SCALED window SDL already reports it in display coordinates
+            mouse_x, mouse_y = mouse_get_pos()
+
+            # Calculate the tile grid position based on the mouse position and scroll offset, the mouse position and
+            # the render scroll are ints, so this is all integer math (no float division and int() conversions)
+            tile_position: tuple[int, int] = (
+                (mouse_x + render_scroll[0]) // tile_size,
+                (mouse_y + render_scroll[1]) // tile_size,
             )
 
             # Add tile if the left mouse button is clicked
             if self.clicking:
-                self.tilemap.tilemap[f"{tile_position[0]};{tile_position[1]}"] = {
-                    "type": self.tile_list[self.tile_group],
-                    "variant": self.tile_variant,
-                    "pos": tile_position,
-                }
+                tilemap.add_tile(
+                    tile_type=tile_list[self.tile_group],
+                    variant=self.tile_variant,
+                    position=tile_position,
+                )
 
             # Delete tile if the right mouse button is clicked
             if self.right_clicking:
-                tile_location: str = f"{tile_position[0]};{tile_position[1]}"
-                if tile_location in self.tilemap.tilemap:
-                    del self.tilemap.tilemap[f"{tile_position[0]};{tile_position[1]}"]
-
-            self.display.blit(source=current_tile_img, dest=(5, 5))
+                tilemap.remove_tile(position=tile_position)
+
+            # Show a preview of where the tile would be placed and the selected tile at the top left corner (HUD)
+            blit_sequence.append(
+                (
+                    current_tile_img,
+                    # the following math is to render the image from the top left corner of the tile position
+                    # taking into accoun the position of the camera (scroll
+                    (
+                        tile_position[0] * tile_size - render_scroll[0],
+                        tile_position[1] * tile_size - render_scroll[1],
+                    ),
+                ),
+            )
+            blit_sequence.append((current_tile_img, (5, 5)))
+            # the tilemap, the preview and the HUD are all drawn with a single fblits call
+            display_fblits(blit_sequence, 0)
 
-            for event in pygame.event.get():
+            for event in event_get():
                 if event.type == pygame.QUIT:
                     # to quit the game we quit pygame and we close the app
                     sys.exit()
@@ -132,66 +177,44 @@ class Editor:
                 if event.type == pygame.MOUSEBUTTONDOWN:
                     if event.button == LEFT_CLICK:  # left button click
                         self.clicking = True
-                    if event.button == RIGHT_CLICK:  # right button click
+                    elif event.button == RIGHT_CLICK:  # right button click
                         self.right_clicking = True
 
-                    if self.shift:  # we are holding shift so within the group go around tile variants
-                        if event.button == MOUSE_WHEEL_SCROLL_UP:  # mouse wheel up
-                            self.tile_variant = (self.tile_variant - 1) % self.variants_count[
-                                self.tile_list[self.tile_group]
-                            ]
-                        if event.button == MOUSE_WHEEL_SCROLL_DOWN:  # mouse wheel down
-                            self.tile_variant = (self.tile_variant + 1) % self.variants_count[
-                                self.tile_list[self.tile_group]
-                            ]
-                    else:  # we are changing group because we are not holding shift
-                        # reset the tile variant, to do not have index errors:w
-                        if event.button == MOUSE_WHEEL_SCROLL_UP:  # mouse wheel up
-                            self.tile_group = (self.tile_group - 1) % self.tile_list_size
-                            self.tile_variant = 0
-                        if event.button == MOUSE_WHEEL_SCROLL_DOWN:  # mouse wheel down
-                            self.tile_group = (self.tile_group + 1) % self.tile_list_size
+                    wheel_step = MOUSE_WHEEL_STEP.get(event.button)
+                    if wheel_step is not None:
+                        if self.shift:  # we are holding shift so within the group go around tile variants
+                            self.tile_variant = (self.tile_variant + wheel_step) % self.variants_count[self.tile_group]
+                        else:  # we are changing group because we are not holding shift
+                            self.tile_group = (self.tile_group + wheel_step) % self.tile_list_size
+                            # reset the tile variant, to do not have index errors
                             self.tile_variant = 0
 
                 if event.type == pygame.MOUSEBUTTONUP:
                     if event.button == LEFT_CLICK:
                         self.clicking = False
-                    if event.button == RIGHT_CLICK:
+                    elif event.button == RIGHT_CLICK:
                         self.right_clicking = False
 
                 if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_LEFT:
-                        self.movement[0] = True
-                    if event.key == pygame.K_RIGHT:
-                        self.movement[1] = True
-                    if event.key == pygame.K_UP:
-                        self.movement[2] = True
-                    if event.key == pygame.K_DOWN:
-                        self.movement[3] = True
-                    if event.key in {pygame.K_LSHIFT, pygame.K_RSHIFT}:
+                    movement_index = MOVEMENT_KEYS.get(event.key)
+                    if movement_index is not None:
+                        movement[movement_index] = True
+                    elif event.key in SHIFT_KEYS:
                         self.shift = True
 
                 # when the key lifts
                 if event.type == pygame.KEYUP:
-                    if event.key == pygame.K_LEFT:
-                        self.movement[0] = False
-                    if event.key == pygame.K_RIGHT:
-                        self.movement[1] = False
-                    if event.key == pygame.K_UP:
-                        self.movement[2] = False
-                    if event.key == pygame.K_DOWN:
-                        self.movement[3] = False
-                    if event.key in {pygame.K_LSHIFT, pygame.K_RSHIFT}:
+                    movement_index = MOVEMENT_KEYS.get(event.key)
+                    if movement_index is not None:
+                        movement[movement_index] = False
+                    elif event.key in SHIFT_KEYS:
                         self.shift = False
 
-            self.screen.blit(
-                source=pygame.transform.scale(surface=self.display, size=self.screen.get_size()),
-                dest=(0, 0),
-            )
+            # we drew straight into the window surface, the GPU does the upscaling when the frame is presented
             # updates the screen, if we do not call this, the changes we made to the screen won't be displayed
-            pygame.display.update()
+            display_update()
             # dynamic sleep, it sleeps as long as it need to mantain the 60fps
-            self.clock.tick(60)
+            clock_tick(60)
 
 
 if __name__ == "__main__":
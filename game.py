@@ -1,15 +1,20 @@
 """Ninja game main script."""
 
 import sys
+from typing import TYPE_CHECKING
 
 import pygame
 from pygame import Surface
+from pygame.event import Event
 
 from scripts.clouds import Clouds
 from scripts.entities import Player
 from scripts.tilemap import Tilemap
 from scripts.utils import Animation, load_image, load_images
 
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
 # aliases
 Color = tuple[int, int, int]
 Vector2D = tuple[float, float] | list[float] | tuple[int, int] | list[int]
@@ -23,10 +28,23 @@ SPEED: float = 5
 LEFT_AXIS_THRESHOLD: float = -0.4
 RIGHT_AXIS_THRESHOLD: float = 0.4
 # screen constants
-SCREEN_SIZE: tuple[int, int] = (640, 480)
-# display size will be half the screen size to keep the proportions
-DISPLAY_SIZE: tuple[int, int] = (SCREEN_SIZE[0] // 2, SCREEN_SIZE[1] // 2)
+# the resolution we draw the game at (pixel art). The window is opened with the SCALED flag, so SDL picks the window
+# size itself, the largest integer multiple of this size that fits the desktop (e.g. 960x720 on a 1080p screen).
+DISPLAY_SIZE: tuple[int, int] = (320, 240)
 SCROLL_STEP: float = 30
+# keyboard keys that control the horizontal movement, mapped to their index in the movement list. A dict lookup
+# replaces a chain of ifs in the event loop.
+MOVEMENT_KEYS: dict[int, int] = {pygame.K_LEFT: 0, pygame.K_RIGHT: 1}
+# the only events the game reacts to, the rest (mouse motion, window events, etc) are dropped by SDL before they reach
+# the python event loop
+ALLOWED_EVENTS: list[int] = [
+    pygame.QUIT,
+    pygame.KEYDOWN,
+    pygame.KEYUP,
+    pygame.JOYHATMOTION,
+    pygame.JOYAXISMOTION,
+    pygame.JOYBUTTONDOWN,
+]
 
 
 class Game:
@@ -39,18 +57,36 @@ class Game:
         # to init joystick (controller, gamepad)
         pygame.joystick.init()
         self.joystics = [pygame.joystick.Joystick(i) for i in range(pygame.joystick.get_count())]
+        # block every event and then allow only the ones we handle, so the event queue only holds what we need
+        pygame.event.set_blocked(None)
+        pygame.event.set_allowed(ALLOWED_EVENTS)
         # here we give a name to the game
         pygame.display.set_caption("Ninja Game")
         # create window (surface is an object representing images in pygame)
         # coordinates system right is positive x and down is positive y
-        self.screen: Surface = pygame.display.set_mode(size=SCREEN_SIZE)
+        # the window surface has the size of the display, the SCALED flag makes SDL scale it up to the window on the
+        # GPU (nearest neighbor, integer factor), so we get the pixel art effect without scaling it ourselves. The
+        # window size is chosen by SDL from the desktop size, not fixed by us.
+        self.screen: Surface = pygame.display.set_mode(size=DISPLAY_SIZE, flags=pygame.SCALED)
         # set custom icons to game
         pygame.display.set_icon(pygame.image.load("data/images/icon.png").convert())
-        # the actual render display, half resolutions of screen
-        # we are going to draw here and the scale it up to the screen, pixel art effect
-        self.display = pygame.Surface(size=DISPLAY_SIZE)  # empty, image of this dimension
+        # the actual render display, half resolutions of screen. With SCALED the window surface already has the
+        # display size, so we draw straight into it instead of drawing somewhere else and copying it every frame.
+        self.display: Surface = self.screen
         self.clock = pygame.time.Clock()
         self.movement: list[bool] = [False, False]
+        # the movement we pass to the player, right minus left (booleans as ints), so -1, 0 or 1 in x. It only changes
+        # when an input event changes the movement list, so we compute it there instead of every frame.
+        self.player_movement: Vector2D = (0, 0)
+        # event type -> the method that handles it, one dict lookup per event instead of a chain of ifs
+        self.event_handlers: dict[int, Callable[[Event], None]] = {
+            pygame.QUIT: self.quit,
+            pygame.KEYDOWN: self.key_down,
+            pygame.KEYUP: self.key_up,
+            pygame.JOYHATMOTION: self.joy_hat_motion,
+            pygame.JOYAXISMOTION: self.joy_axis_motion,
+            pygame.JOYBUTTONDOWN: self.joy_button_down,
+        }
         # this dictionary has key str and value Surface or list[Surface], be mindfull of that
         self.assets: dict = {
             "decor": load_images("tiles/decor"),
@@ -58,7 +94,8 @@ class Game:
             "stone": load_images("tiles/stone"),
             "large_decor": load_images("tiles/large_decor"),
             "player": load_image("entities/player.png"),
-            "background": load_image("background.png"),
+            # the background covers the whole display, it is opaque so it does not need a color key
+            "background": load_image("background.png", color_key=None),
             "clouds": load_images("clouds"),
             "player/idle": Animation(images=load_images("entities/player/idle"), image_duration=6),
             "player/run": Animation(images=load_images("entities/player/run"), image_duration=4),
@@ -66,6 +103,9 @@ class Game:
             "player/slide": Animation(images=load_images("entities/player/slide")),
             "player/wall_slide": Animation(images=load_images("entities/player/wall_slide")),
         }
+        # make sure the background has exactly the size of the display, so every frame is a plain full surface copy
+        if self.assets["background"].get_size() != DISPLAY_SIZE:
+            self.assets["background"] = pygame.transform.scale(surface=self.assets["background"], size=DISPLAY_SIZE)
         # cloud collection
         self.clouds = Clouds(cloud_images=self.assets["clouds"], count=16)
 
@@ -76,12 +116,91 @@ class Game:
         # for us the scroll is the camera position
         self.scroll: list[float] = [0, 0]
 
-    def run(self) -> None:  # noqa: C901, PLR0912
+    def quit(self, event: Event) -> None:  # noqa: ARG002
+        """Quit pygame and close the app."""
+        pygame.quit()
+        sys.exit()
+
+    # all buttons game pad events, see https://www.pygame.org/docs/ref/joystick.html for more reference
+    # keydown doesn't mean something is being pressed continuosly, combining keydown and key up we can get holding
+    # behavior
+    def key_down(self, event: Event) -> None:
+        """Start moving or jump when a key is pressed."""
+        movement_index = MOVEMENT_KEYS.get(event.key)
+        if movement_index is not None:
+            self.movement[movement_index] = True
+            self.update_player_movement()
+        elif event.key == pygame.K_UP:
+            # override vertical velocity to jump
+            self.player.velocity_y = JUMP_SPEED
+
+    def key_up(self, event: Event) -> None:
+        """Stop moving when the key lifts."""
+        movement_index = MOVEMENT_KEYS.get(event.key)
+        if movement_index is not None:
+            self.movement[movement_index] = False
+            self.update_player_movement()
+
+    def joy_hat_motion(self, event: Event) -> None:
+        """Move using the dpad."""
+        movement = self.movement
+        if event.value == (-1, 0):  # left
+            movement[0] = True
+        if event.value == (1, 0):
+            movement[1] = True  # right
+        if event.value == (0, 0):
+            movement[0] = movement[1] = False
+        self.update_player_movement()
+
+    def joy_axis_motion(self, event: Event) -> None:
+        """Move using the joysticks (axis 0 is left right of Left Axis, axis 1 is right of left axis)."""
+        if event.axis != 0:
+            return
+        movement = self.movement
+        if event.value < LEFT_AXIS_THRESHOLD:  # axis moved to the left
+            movement[0] = True
+            movement[1] = False
+        elif event.value > RIGHT_AXIS_THRESHOLD:  # axis moved to the right
+            movement[1] = True
+            movement[0] = False
+        else:
+            movement[0] = False
+            movement[1] = False
+        self.update_player_movement()
+
+    def joy_button_down(self, event: Event) -> None:
+        """Jump with the first game pad button."""
+        if event.button == 0:
+            # jump by overriding the vertical velocity
+            self.player.velocity_y = JUMP_SPEED
+
+    def update_player_movement(self) -> None:
+        """Recompute the movement passed to the player from the movement list."""
+        self.player_movement = (self.movement[1] - self.movement[0], 0)
+
+    def run(self) -> None:
         """Run game loop."""
+        # bind what the loop uses every frame to local variables once. Local variables are the fastest lookups in
+        # python, attributes and globals need a dictionary lookup each time we use them.
+        display = self.display
+        display_blit = display.blit
+        # the display size never changes, so half of it (where the camera centers the player) is computed once
+        half_display_width: float = display.get_width() / 2
+        half_display_height: float = display.get_height() / 2
+        background = self.assets["background"]
+        clouds = self.clouds
+        tilemap = self.tilemap
+        player = self.player
+        scroll = self.scroll
+        animation_tick_all = Animation.tick_all
+        event_get = pygame.event.get
+        event_handlers = self.event_handlers
+        display_update = pygame.display.update
+        clock_tick = self.clock.tick
         # a game loop: the game everyframe, there can be multiple game loop running simultaneusly
         # each frame is an iteration in the loop
         while True:
-            self.display.blit(source=self.assets["background"], dest=(0, 0))
+            display_blit(source=background, dest=(0, 0))
             # we want our camera to center the player smothly. We divide between the display width to adjust to the fact
             # that the player centerx is the top left of the player, by dividing by the display width we ensure the
             # player is at the center of the camera.
@@ -91,86 +210,38 @@ class Game:
             # be.
             # So in a nutshell our "camera" or "viewport" is just moving everything a bit in some direction to always
             # have in this case the player at the middle of the screen.
-            self.scroll[0] += (
-                (self.player.rect().centerx - self.display.get_width() / 2) - self.scroll[0]
-            ) / SCROLL_STEP
+            # we build the player rect only once per frame and take both centers from it
+            player_center_x, player_center_y = player.rect().center
+            scroll[0] += (player_center_x - half_display_width - scroll[0]) / SCROLL_STEP
             # the process is equivalent for the y position of the camera
-            self.scroll[1] += (
-                (self.player.rect().centery - self.display.get_height() / 2) - self.scroll[1]
-            ) / SCROLL_STEP
+            scroll[1] += (player_center_y - half_display_height - scroll[1]) / SCROLL_STEP
             # the approach before might cause some jittering due to subpixel movement, so we will transform everything
             # so we will transform to int an pass that, so that it is smoth for pixel art, not an issue for the camera
             # to use int
 
-            render_scroll: Vector2D = (int(self.scroll[0]), int(self.scroll[1]))
+            render_scroll: Vector2D = (int(scroll[0]), int(scroll[1]))
             # we want the clouds to be render before/behind the tiles
-            self.clouds.update()
+            clouds.update()
             # the offset parameter is how much we move the object we are about to render
-            self.clouds.render(surface=self.display, offset=render_scroll)
-            self.tilemap.render(self.display, offset=render_scroll)
+            clouds.render(surface=display, offset=render_scroll)
+            tilemap.render(display, offset=render_scroll)
+            # advance every animation one frame, once for all of them
+            animation_tick_all()
             # we only want to update x, not y, because platformer
-            self.player.update(
-                tilemap=self.tilemap,
-                movement=(self.movement[1] - self.movement[0], 0),
-            )
-            self.player.render(surface=self.display, offset=render_scroll)
-            for event in pygame.event.get():
-                # events have types, so that's how we know what happen
-                # print event
-                if event.type == pygame.QUIT:
-                    # to quit the game we quit pygame and we close the app
-                    pygame.quit()
-                    sys.exit()
-                # all buttons game pad events, see https://www.pygame.org/docs/ref/joystick.html for more reference
-                # keydown doesn't mean something is being pressed continuosly, combining keydown and key up we can get
-                # holding behavior
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_LEFT:
-                        self.movement[0] = True
-                    if event.key == pygame.K_RIGHT:
-                        self.movement[1] = True
-                    if event.key == pygame.K_UP:
-                        # override vertical velocity to jump
-                        self.player.velocity[1] = JUMP_SPEED
-                # when the key lifts
-                if event.type == pygame.KEYUP:
-                    if event.key == pygame.K_LEFT:
-                        self.movement[0] = False
-                    if event.key == pygame.K_RIGHT:
-                        self.movement[1] = False
-                # using the dpad
-                if event.type == pygame.JOYHATMOTION:
-                    if event.value == (-1, 0):  # left
-                        self.movement[0] = True
-                    if event.value == (1, 0):
-                        self.movement[1] = True  # right
-                    if event.value == (0, 0):
-                        self.movement = [False, False]
-
-                # using the joysticks (axis 0 is left right of Left Axis, axis 1 is right of left axis)
-                if event.type == pygame.JOYAXISMOTION and event.axis == 0:
-                    if event.value < LEFT_AXIS_THRESHOLD:  # axis moved to the left
-                        self.movement[0] = True
-                        self.movement[1] = False
-                    elif event.value > RIGHT_AXIS_THRESHOLD:  # axis moved to the right
-                        self.movement[1] = True
-                        self.movement[0] = False
-                    else:
-                        self.movement[0] = False
-                        self.movement[1] = False
-
-                if event.type == pygame.JOYBUTTONDOWN and event.button == 0:
-                    # jump by overriding the vertical velocity
-                    self.player.velocity[1] = JUMP_SPEED
-            # we render the display scale up into the screen, for that we use pygame.transform.scale
-            self.screen.blit(
-                source=pygame.transform.scale(surface=self.display, size=self.screen.get_size()),
-                dest=(0, 0),
-            )
-            # updates the screen, if we do not call this, the changes we made to the screen won't be displayed
-            pygame.display.update()
+            player.update(tilemap=tilemap, movement=self.player_movement)
+            player.render(surface=display, offset=render_scroll)
+            for event in event_get():
+                # events have types, so that's how we know what happen. Each type we care about has its handler, the
+                # rest are ignored (set_allowed already keeps most of them out of the queue)
+                handler = event_handlers.get(event.type)
+                if handler is not None:
+                    handler(event)
+            # we drew straight into the window surface, the GPU does the upscaling when the frame is presented.
+            # updates the screen, if we do not call this, the changes we made to the screen won't be displayed. With a
+            # SCALED window SDL presents the whole frame anyway, so there is no point in passing only dirty rects.
+            display_update()
             # dynamic sleep, it sleeps as long as it need to mantain the 60fps
-            self.clock.tick(60)
+            clock_tick(60)
 
 
 if __name__ == "__main__":
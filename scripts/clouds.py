@@ -8,7 +8,7 @@ Vector2D = tuple[float, float] | list[float] | list[int] | tuple[int, int]
 
 
 class Cloud:
-    """Cloud object."""
+    """Cloud object, the record we use to build and sort the cloud collection."""
 
     def __init__(self, position: Vector2D, img: Surface, speed: float, depth: float) -> None:
         """Init cloud object."""
@@ -17,38 +17,13 @@ class Cloud:
         self.depth: float = depth
         self.speed: float = speed
 
-    def update(self) -> None:
-        """Update position of cloud."""
-        self.position[0] += self.speed
-
-    def render(self, surface: Surface, offset: Vector2D) -> None:
-        """Render."""
-        # here we use the depth to creat a parallax effect see: https://en.wikipedia.org/wiki/Parallax_scrolling
-        # to know more about parallax effect, essentially we are making the cloud move slower to give a sense of
-        # depth and layers.
-        # we apply offset negatively to move the things in the opposite direction to the where the camera is moving
-        render_position: tuple[float, float] = (
-            self.position[0] - offset[0] * self.depth,
-            self.position[1] - offset[1] * self.depth,
-        )
-        # Here we use the modulo operator for looping.
-        # We use modulo so that when the image goes out of the screen in width, it reappears on the other end.
-        # We add the img.get_width() to ensure the image is fully out of the screen before teleporting to the other end.
-        surface.blit(
-            source=self.img,
-            dest=(
-                render_position[0] % (surface.get_width() + self.img.get_width()) - self.img.get_width(),
-                render_position[1] % (surface.get_height() + self.img.get_height()) - self.img.get_height(),
-            ),
-        )
-
 
 class Clouds:
     """Cloud collection object."""
 
     def __init__(self, cloud_images: list[Surface], count: int = 16) -> None:
         """Init the cloud collection."""
-        self.clouds: list[Cloud] = [
+        clouds: list[Cloud] = [
             Cloud(
                 position=(random.random() * 99999, random.random() * 9999),
                 img=random.choice(cloud_images),
@@ -58,14 +33,49 @@ class Clouds:
             for _ in range(count)
         ]
         # to push the clouds closest to the camera are push to the front.
-        self.clouds.sort(key=lambda cloud: cloud.depth)
+        clouds.sort(key=lambda cloud: cloud.depth)
+        # the collection keeps the clouds as a structure of arrays (one list per attribute) instead of a list of cloud
+        # objects, the update and render loops then walk flat lists of floats with zip, without attribute lookups on
+        # each cloud.
+        self.images: list[Surface] = [cloud.img for cloud in clouds]
+        # the image sizes never change, so we ask for them once instead of in every render call
+        self.widths: list[int] = [cloud.img.get_width() for cloud in clouds]
+        self.heights: list[int] = [cloud.img.get_height() for cloud in clouds]
+        self.positions_x: list[float] = [cloud.position[0] for cloud in clouds]
+        self.positions_y: list[float] = [cloud.position[1] for cloud in clouds]
+        self.speeds: list[float] = [cloud.speed for cloud in clouds]
+        self.depths: list[float] = [cloud.depth for cloud in clouds]
 
     def update(self) -> None:
         """Update clouds position."""
-        for cloud in self.clouds:
-            cloud.update()
+        # clouds only move in x
+        self.positions_x = [x + speed for x, speed in zip(self.positions_x, self.speeds, strict=True)]
 
     def render(self, surface: Surface, offset: Vector2D = (0, 0)) -> None:
         """Render the cloud collection."""
-        for cloud in self.clouds:
-            cloud.render(surface=surface, offset=offset)
+        surface_width, surface_height = surface.get_size()
+        # here we use the depth to creat a parallax effect see: https://en.wikipedia.org/wiki/Parallax_scrolling
+        # to know more about parallax effect, essentially we are making the cloud move slower to give a sense of
+        # depth and layers.
+        # we apply offset negatively to move the things in the opposite direction to the where the camera is moving
+        # Here we use the modulo operator for looping.
+        # We use modulo so that when the image goes out of the screen in width, it reappears on the other end.
+        # We add the image width to ensure the image is fully out of the screen before teleporting to the other end.
+        offset_x, offset_y = offset
+        destinations: list[tuple[float, float]] = [
+            (
+                (x - offset_x * depth) % (surface_width + width) - width,
+                (y - offset_y * depth) % (surface_height + height) - height,
+            )
+            for x, y, depth, width, height in zip(
+                self.positions_x,
+                self.positions_y,
+                self.depths,
+                self.widths,
+                self.heights,
+                strict=True,
+            )
+        ]
+        # the clouds are already sorted by depth, so we can draw all of them with a single fblits call, farther
+        # clouds first.
+        surface.fblits(zip(self.images, destinations, strict=True), 0)
@@ -2,7 +2,6 @@
 
 from typing import TYPE_CHECKING
 
-import pygame
 from pygame import Rect, Surface
 
 from scripts.tilemap import Tilemap
@@ -20,21 +19,49 @@ DELTA_VELOCITY_PER_FRAME: float = 0.1
 class PhysicsEntity:
     """A Physics entity class."""
 
+    # a fixed set of attributes, stored in slots instead of a per instance dictionary, so reading and writing them in
+    # the physics update every frame is a direct slot access
+    __slots__ = (
+        "action",
+        "animation",
+        "animation_offset",
+        "collision_down",
+        "collision_left",
+        "collision_right",
+        "collision_up",
+        "flip",
+        "game",
+        "position_x",
+        "position_y",
+        "size",
+        "type",
+        "velocity_x",
+        "velocity_y",
+    )
+
     def __init__(self, game: "Game", entity_type: str, position: tuple[float, float], size: tuple[int, int]) -> None:
         """Init class."""
         self.game = game
         self.type = entity_type
-        # the position is the top (position[0], -left (position[1]) of our entity
-        # also the position[0] is the x axis, the position[1] is the y axis
-        self.position = list(position)  # to ensure that each entity has its own
+        # the position is the top-left of our entity, x and y are kept as two float attributes instead of a list, so
+        # the physics update reads and writes plain attributes instead of indexing a list
+        self.position_x: float
+        self.position_y: float
+        self.position_x, self.position_y = position
         # the size of the entity
         # remember that size [1] is height, size [0] is width
         self.size = size
         # rate of change in the position, acceleration is the rate of change in velocity
-        self.velocity: list[float] = [0, 0]
+        self.velocity_x: float = 0
+        self.velocity_y: float = 0
         # usually acceleration is a constant (gravity)
         # to keep track of which collisions we had, it is useful for wall jumping to.
-        self.collisions: dict[str, bool] = {"up": False, "down": False, "left": False, "right": False}
+        # we use one bool attribute per side instead of a dictionary, so we do not build a new dictionary every frame
+        # and we do not hash string keys every time we check or set a collision.
+        self.collision_up: bool = False
+        self.collision_down: bool = False
+        self.collision_left: bool = False
+        self.collision_right: bool = False
 
         # our animation is a state machine essentially
         self.action: str = ""
@@ -55,7 +82,7 @@ class PhysicsEntity:
 
         """
         # better to build the new all the time than updating it
-        return Rect(self.position[0], self.position[1], self.size[0], self.size[1])
+        return Rect(self.position_x, self.position_y, self.size[0], self.size[1])
 
     def set_action(self, action: str) -> None:
         """Set the action of the physics entity."""
@@ -68,73 +95,94 @@ class PhysicsEntity:
 
     def update(self, tilemap: Tilemap, movement: Vector2D = (0, 0)) -> None:  # noqa: C901
         """Update physics entity position."""
-        # reset collisions dictionary
-        self.collisions = {"up": False, "down": False, "right": False, "left": False}
-        frame_movement = (movement[0] + self.velocity[0], movement[1] + self.velocity[1])
+        frame_movement_x = movement[0] + self.velocity_x
+        frame_movement_y = movement[1] + self.velocity_y
+        # idle fast path: if we were standing on the ground and we are not moving this frame, the position does not
+        # change and we touch nothing (standing on a tile is not overlapping it), so there is nothing to resolve. We
+        # skip the tiles lookup and collision loops and just do what the end of the update would do.
+        if self.collision_down and frame_movement_x == 0 and frame_movement_y == 0:
+            self.collision_down = self.collision_up = self.collision_right = self.collision_left = False
+            self.velocity_y = min(TERMINAL_VELOCITY, self.velocity_y + DELTA_VELOCITY_PER_FRAME)
+            return
+        # reset collisions
+        self.collision_up = self.collision_down = self.collision_right = self.collision_left = False
         # we do the position update in two dimensions, separately. This is useful to know what was
         # collide with and to act accordingly.
-        # move first, then make rectangle, then check collision in right and left, based on that update position.
-        self.position[0] += frame_movement[0]
-        entity_rect = self.rect()
+        # we check the collisions with plain numbers (axis aligned bounding boxes) instead of building pygame Rects,
+        # two boxes collide if they overlap in both axes. The entity box is truncated to ints, as a Rect would do.
+        entity_width, entity_height = self.size
+        # move first, then make the box, then check collision in right and left, based on that update position.
+        self.position_x += frame_movement_x
+        entity_x, entity_y = int(self.position_x), int(self.position_y)
         # handle if the collision was from moving left and right
-        for rect in tilemap.physics_rects_around(self.position):
-            if entity_rect.colliderect(rect):
+        for tile_x, tile_y, tile_width, tile_height in tilemap.physics_rects_around((self.position_x, self.position_y)):
+            if (
+                entity_x < tile_x + tile_width
+                and entity_x + entity_width > tile_x
+                and entity_y < tile_y + tile_height
+                and entity_y + entity_height > tile_y
+            ):
                 # we had a collision, so handle
                 # first case I moved right and i collided with a tile, so:
                 # snap the entity right "border" to the left "border" of the tile
-                if frame_movement[0] > 0:  # remember positive x frame movement means right
-                    entity_rect.right = rect.left
-                    self.collisions["right"] = True
+                if frame_movement_x > 0:  # remember positive x frame movement means right
+                    entity_x = tile_x - entity_width
+                    self.collision_right = True
                 # second case I moved left and I collided with a tile, so:
                 # snap the entity left "border" to the right "border" of the tile
-                if frame_movement[0] < 0:  # remember negative x frame movement means left
-                    entity_rect.left = rect.right
-                    self.collisions["left"] = True
-                # here we only updated the rect position, we need to update the player position.
+                if frame_movement_x < 0:  # remember negative x frame movement means left
+                    entity_x = tile_x + tile_width
+                    self.collision_left = True
+                # here we only updated the box position, we need to update the player position.
                 # player position should be a tuple of float to allow to subpixel position, even when
                 # with rendering it will default to int, saving the subpixel increments is useful. We can
                 # get that functionality with FRect in pygame-ce. So to do not use the extra pos list.
                 # Update the entity's position to match the resolved collision position
-                self.position[0] = entity_rect.x
-        # first move, then make a rect, then check collision up and down, then update position.
-        self.position[1] += frame_movement[1]
-        # we make a new rect because the old one might be outdated
-        entity_rect = self.rect()
-        for rect in tilemap.physics_rects_around(self.position):
-            if entity_rect.colliderect(rect):
-                # if we collided while going down, entity bottom will be rect top
-                if frame_movement[1] > 0:  # remember positive y frame movement means down
-                    entity_rect.bottom = rect.top
-                    self.collisions["down"] = True
-                # if we collided while going up, entity top will be rect bottom
-                if frame_movement[1] < 0:  # remember negative y frame movement means up
-                    entity_rect.top = rect.bottom
-                    self.collisions["up"] = True
+                self.position_x = entity_x
+        # first move, then make a box, then check collision up and down, then update position.
+        self.position_y += frame_movement_y
+        # we make a new box because the old one might be outdated
+        entity_x, entity_y = int(self.position_x), int(self.position_y)
+        for tile_x, tile_y, tile_width, tile_height in tilemap.physics_rects_around((self.position_x, self.position_y)):
+            if (
+                entity_x < tile_x + tile_width
+                and entity_x + entity_width > tile_x
+                and entity_y < tile_y + tile_height
+                and entity_y + entity_height > tile_y
+            ):
+                # if we collided while going down, entity bottom will be tile top
+                if frame_movement_y > 0:  # remember positive y frame movement means down
+                    entity_y = tile_y - entity_height
+                    self.collision_down = True
+                # if we collided while going up, entity top will be tile bottom
+                if frame_movement_y < 0:  # remember negative y frame movement means up
+                    entity_y = tile_y + tile_height
+                    self.collision_up = True
                 # Update the entity's position to match the resolved collision position
-                self.position[1] = entity_rect.y
+                self.position_y = entity_y
         # we apply acceleration by modifying velocity
         # here we use terminal velocity
         # update y velocity
-        self.velocity[1] = min(TERMINAL_VELOCITY, self.velocity[1] + DELTA_VELOCITY_PER_FRAME)
+        self.velocity_y = min(TERMINAL_VELOCITY, self.velocity_y + DELTA_VELOCITY_PER_FRAME)
         # reset velocity if we collided with the ground or the floor
-        if self.collisions["down"] or self.collisions["up"]:
-            self.velocity[1] = 0
-        # updating the animation
+        if self.collision_down or self.collision_up:
+            self.velocity_y = 0
+        # updating the animation, its frame advances with the game (Animation.tick_all), we only pick the direction
         if movement[0] > 0:  # we are moving right
             self.flip = False
         if movement[0] < 0:  # we are moving left
             self.flip = True
-        self.animation.update()
 
     def render(self, surface: Surface, offset: Vector2D) -> None:
         """Render the physics entity into the surface."""
         # we apply offset negatively to move the things in the opposite direction to the where the camera is moving
         # then we apply the animation offset to pad
+        # the animation already has its images flipped, so we just pick the right ones
         surface.blit(
-            pygame.transform.flip(self.animation.img(), flip_x=self.flip, flip_y=False),
+            self.animation.img_flipped() if self.flip else self.animation.img(),
             (
-                self.position[0] - offset[0] + self.animation_offset[0],
-                self.position[1] - offset[1] + self.animation_offset[1],
+                self.position_x - offset[0] + self.animation_offset[0],
+                self.position_y - offset[1] + self.animation_offset[1],
             ),
         )
 
@@ -146,17 +194,21 @@ MAX_CONSECUTIVE_JUMPS: int = 2
 class Player(PhysicsEntity):
     """A player object."""
 
+    __slots__ = ("air_time", "jump_count")
+
     def __init__(self, game: "Game", position: tuple[float, float], size: tuple[int, int]) -> None:
         """Init a Player object."""
         super().__init__(game, "player", position, size)
         # to keep track of how long have we been in the air
         self.air_time: int = 0
+        # how many jumps we did since we last touched the ground
+        self.jump_count: int = 0
 
     def update(self, tilemap: Tilemap, movement: Vector2D = (0, 0)) -> None:
         """Update player position and state."""
         super().update(tilemap=tilemap, movement=movement)
         self.air_time += 1
-        if self.collisions["down"]:
+        if self.collision_down:
             self.air_time = 0
             self.jump_count = 0
 
@@ -1,14 +1,17 @@
 """Tilemap module."""
 
-from pygame import Rect, Surface
+from bisect import bisect_left, insort
+from collections.abc import Iterator
+from math import floor
+
+from pygame import Surface
 
 # aliases
 Vector2D = tuple[float, float] | list[float] | list[int] | tuple[int, int]
-Tile = dict[str, str | int | tuple[float, float]]
 # for physics and collisions with the player, one efficient way to do it is to know what are the
 # neighboring tile to the player and only simulate collision with those. (take care if the sprite for the player
 # is bigger)
-NEIGHBOR_OFFSET: list[tuple[float, float]] = [
+NEIGHBOR_OFFSET: tuple[tuple[int, int], ...] = (
     (-1, 0),
     (-1, -1),
     (0, -1),
@@ -18,11 +21,45 @@ NEIGHBOR_OFFSET: list[tuple[float, float]] = [
     (-1, 1),
     (0, 1),
     (1, 1),
-]
+)
 # a set to store the tile type we want to have physics, sets use the
 PHYSICS_TILES: set[str] = {"grass", "stone"}
 
 
+class Tile:
+    """A tile of the map, on the grid or off grid."""
+
+    # tiles are many and read in every frame, with slots each tile is a small fixed record (no per tile dictionary)
+    # and reading an attribute is a direct slot access instead of hashing a string key
+    __slots__ = ("img", "pixel_pos", "pos", "rect", "solid", "type", "variant")
+
+    def __init__(
+        self,
+        *,
+        tile_type: str,
+        variant: int,
+        position: Vector2D,
+        img: Surface,
+        rect: tuple[float, float, int, int],
+    ) -> None:
+        """Init a tile, position is the grid position for grid tiles and the pixel position for off grid tiles."""
+        self.type: str = tile_type
+        self.variant: int = variant
+        self.pos: Vector2D = position
+        # the image of the tile, the assets are loaded once and never change, so we look it up once instead of going
+        # through the assets dictionary and the variants list for every tile in every frame
+        self.img: Surface = img
+        # the (left, top, width, height) box the tile takes in pixels, tiles do not move so it is built once. For grid
+        # tiles it is the grid cell, the box the physics collides with. For off grid tiles it is the image area, that
+        # we use to skip the ones that are outside of the screen.
+        self.rect: tuple[float, float, int, int] = rect
+        # the pixel position of the top left corner of the tile, where it is drawn
+        self.pixel_pos: tuple[float, float] = (rect[0], rect[1])
+        # whether the tile takes part in the physics, checked once here instead of a set lookup every frame. Only grid
+        # tiles are part of the physics, so it is never read for off grid tiles.
+        self.solid: bool = tile_type in PHYSICS_TILES
+
+
 class Tilemap:
     """Tile map class."""
 
@@ -30,6 +67,9 @@ class Tilemap:
         """Init tilemap."""
         self.game = game
         self.tile_size = tile_size
+        # when the tile size is a power of two (like 16) going from pixels to the grid is a right shift by this many
+        # bits, cheaper than a floor division. None when it is not a power of two, then we divide.
+        self.tile_shift: int | None = tile_size.bit_length() - 1 if tile_size & (tile_size - 1) == 0 else None
         # The tilemap is implemented as a dictionary to efficiently store and access the tiles.
         # Unlike a matrix approach (where tiles might be represented by 1s and empty spaces by 0s),
         # a dictionary allows for sparse storage. This means we only store entries for tiles that exist,
@@ -38,89 +78,196 @@ class Tilemap:
         # This dictionary will be the primary structure for handling physics interactions within the game,
         # as it allows for quick lookups and updates of tile states based on their grid coordinates.
         #
-        # The keys in this dictionary represent the grid coordinates (x, y) of each tile. Given that each
-        # tile has a fixed size (16x16 pixels in this case), rendering the tiles requires converting these
-        # grid coordinates into pixel coordinates. This conversion is straightforward: multiply the grid
+        # The keys in this dictionary are the grid coordinates (x, y) of each tile as a tuple of ints. A tuple of ints
+        # is cheap to build and hash, unlike a formatted "x;y" string that needs to be allocated on every lookup.
+        # Given that each tile has a fixed size (16x16 pixels in this case), rendering the tiles requires converting
+        # these grid coordinates into pixel coordinates. This conversion is straightforward: multiply the grid
         # coordinates by the tile size to determine the pixel coordinates of the tile's top-left corner.
         # This approach simplifies the rendering process and aligns with how we handle physics and other
         # game mechanics based on the tilemap.
-        self.tilemap: dict = {}
+        self.tilemap: dict[tuple[int, int], Tile] = {}
+        # a column index of the tilemap: for each grid x that has tiles, the sorted grid ys of its tiles. Rendering
+        # uses it to visit only the tiles inside the screen, instead of probing every (mostly empty) visible cell.
+        # add_tile and remove_tile keep it in sync with the tilemap.
+        self.columns: dict[int, list[int]] = {}
         # things that are all over the place that might no line up with the grid
-        # they will be the dictionary {type, variant, pos (already in pixels)}
+        # they will be Tile objects (their pos is already in pixels), added with add_offgrid_tile
         # we mostly use off grid tiles for decor
-        self.offgrid_tiles = []
+        self.offgrid_tiles: list[Tile] = []
+        # the last blit sequence we built and the view (camera offset and surface size) it was built for. While the
+        # camera does not move and the map is not edited the sequence is the same, so we reuse it instead of culling
+        # and building it again. Editing the map resets the view, so the next call builds it again.
+        self.cached_view: tuple[float, float, int, int] | None = None
+        self.cached_blit_sequence: list[tuple[Surface, tuple[float, float]]] = []
         # creating some tiles
 
-    def tiles_around(self, position: Vector2D) -> list:
+    def add_tile(self, tile_type: str, variant: int, position: Vector2D) -> None:
+        """Add a tile to the grid at a grid position, replacing the tile that was there if any."""
+        # the key and the stored grid position are always a tuple of ints (even if we get a list, like the ones in the
+        # json maps), tuples of ints are hashable and the cheapest key to build and compare in the lookups.
+        position = (int(position[0]), int(position[1]))
+        # the map changes, so the cached blit sequence is outdated
+        self.cached_view = None
+        if position not in self.tilemap:
+            # a new cell, keep the column sorted so render can slice the visible range with a binary search
+            insort(self.columns.setdefault(position[0], []), position[1])
+        self.tilemap[position] = Tile(
+            tile_type=tile_type,
+            variant=variant,
+            position=position,
+            img=self.game.assets[tile_type][variant],
+            # in pixels (as ints), instead of multiplying the grid position by the tile size for every tile in every
+            # frame
+            rect=(position[0] * self.tile_size, position[1] * self.tile_size, self.tile_size, self.tile_size),
+        )
+
+    def add_offgrid_tile(self, tile_type: str, variant: int, position: Vector2D) -> None:
+        """Add a tile that does not line up with the grid at a pixel position."""
+        # the map changes, so the cached blit sequence is outdated
+        self.cached_view = None
+        img: Surface = self.game.assets[tile_type][variant]
+        position = (position[0], position[1])
+        # off grid tiles are already in pixels. We keep the image size, that we use to skip the tiles that are outside
+        # of the screen without asking the image for it every frame
+        self.offgrid_tiles.append(
+            Tile(
+                tile_type=tile_type,
+                variant=variant,
+                position=position,
+                img=img,
+                rect=(*position, *img.get_size()),
+            ),
+        )
+
+    def remove_tile(self, position: Vector2D) -> None:
+        """Remove the tile at a grid position, if there is one."""
+        # the same key add_tile uses, a tuple of ints, even if we get a list (like the positions in the json maps)
+        position = (int(position[0]), int(position[1]))
+        # pop with a default removes the tile if it exists with a single lookup
+        if self.tilemap.pop(position, None) is not None:
+            # the map changes, so the cached blit sequence is outdated
+            self.cached_view = None
+            column = self.columns[position[0]]
+            column.remove(position[1])
+            if not column:
+                # drop empty columns, so render does not visit them
+                del self.columns[position[0]]
+
+    def tiles_around(self, position: Vector2D) -> list[Tile]:
         """Get the tiles around a tile.
 
         Returns
         -------
-          list[tiles] the list of tiles around a position.
+          list[Tile] the list of tiles around a position.
 
         """
-        tiles: list = []
-        # be careful when rounding grid and position, we use interger division here to ensure a expected behavior
-        tile_location = (int(position[0] // self.tile_size), int(position[1] // self.tile_size))
-        for offset in NEIGHBOR_OFFSET:
-            check_loc = str(tile_location[0] + offset[0]) + ";" + str(tile_location[1] + offset[1])
-            if check_loc in self.tilemap:
-                tiles.append(self.tilemap[check_loc])
-        return tiles
-
-    def physics_rects_around(self, position: Vector2D) -> list[Rect]:
-        """Return the tiles as pygame Rects for physics.
+        # this runs for every entity in every frame, so what we use in the loop is bound to locals first
+        tile_shift = self.tile_shift
+        tilemap_get = self.tilemap.get
+        # be careful when rounding grid and position, we floor (not truncate) so negative positions land in the right
+        # tile. Shifting the floored int right is the same as the floor division by a power of two tile size.
+        if tile_shift is not None:
+            tile_x = floor(position[0]) >> tile_shift
+            tile_y = floor(position[1]) >> tile_shift
+        else:
+            tile_x = int(position[0] // self.tile_size)
+            tile_y = int(position[1] // self.tile_size)
+        # get does a single lookup instead of `in` + indexing, the walrus keeps the tile it found
+        return [
+            tile
+            for offset_x, offset_y in NEIGHBOR_OFFSET
+            if (tile := tilemap_get((tile_x + offset_x, tile_y + offset_y))) is not None
+        ]
+
+    def physics_rects_around(self, position: Vector2D) -> Iterator[tuple[int, int, int, int]]:
+        """Yield the tiles as rects for physics, plain (left, top, width, height) tuples.
 
         Returns
         -------
-         list[Rect] Tiles rects around a position
+         Iterator[tuple[int, int, int, int]] Tiles rects around a position
 
         """
-        # remember that rect receives left, top, width and heigh, the position will be the pixel position, that's why
-        # we are multiplying the grid position by the tile size to get the actual pixel position tha we need to render.
-        return [
-            Rect(tile["pos"][0] * self.tile_size, tile["pos"][1] * self.tile_size, self.tile_size, self.tile_size)
-            for tile in self.tiles_around(position)
-            if tile["type"] in PHYSICS_TILES
-        ]
+        # the position will be the pixel position, each tile already has its box, built when it was added.
+        # we yield tuples and not pygame Rects, the physics only needs the numbers to do the collision checks, so we
+        # save creating a Rect object for each tile around the entity every frame. The physics only loops over them
+        # once, so a generator is enough and we do not build a new list on every call.
+        return (tile.rect for tile in self.tiles_around(position) if tile.solid)
 
-    def render(self, surface: Surface, offset: Vector2D = (0, 0)) -> None:
-        """Render tilemap and offgrid tiles."""
-        # we might need to optimize the off grid tile if they are a lot in a big world
+    def blit_sequence(self, surface: Surface, offset: Vector2D = (0, 0)) -> list[tuple[Surface, tuple[float, float]]]:
+        """Get the (image, destination) pairs of the offgrid and visible tiles, ready for surface.fblits.
+
+        The list is reused while the view does not change, callers that want to add things to it must copy it first.
+
+        Returns
+        -------
+         list[tuple[Surface, tuple[float, float]]] the tiles to draw into the surface, in drawing order.
+
+        """
+        surface_width, surface_height = surface.get_size()
+        camera_x, camera_y = offset[0], offset[1]
+        view = (camera_x, camera_y, surface_width, surface_height)
+        if view == self.cached_view:
+            # same camera, same surface and no edits since the last call, same tiles in the same places
+            return self.cached_blit_sequence
+        # instead of calling surface.blit once per tile (one python -> C call each), we collect every
+        # (image, destination) pair in a list and hand it to surface.fblits in a single call. fblits (pygame-ce) skips
+        # the per item checks and return rects that blits does, so it is the fastest way to draw many surfaces.
+        # Callers that draw more things on top (like the editor) can append to a copy of the list and still use a
+        # single call.
+        blit_sequence: list[tuple[Surface, tuple[float, float]]] = []
+        blit_sequence_append = blit_sequence.append
+        # we might need to optimize the off grid tile if they are a lot in a big world, for now we only skip the ones
+        # that are completely outside the surface, so fblits does not have to set up and clip a blit that draws nothing
         for tile in self.offgrid_tiles:
-            surface.blit(
-                source=self.game.assets[tile["type"]][tile["variant"]],
-                dest=(
-                    tile["pos"][0] - offset[0],
-                    tile["pos"][1] - offset[1],
-                ),  # here we apply the offset, negative because so that everythin in the screen moves to the left
-            )
-        # one optimization that we can make here is to render only the tiles that are visible in the screen, not all of
-        # them
+            # here we apply the offset, negative because so that everythin in the screen moves to the left
+            pixel_x, pixel_y, width, height = tile.rect
+            dest_x = pixel_x - camera_x
+            dest_y = pixel_y - camera_y
+            if -width < dest_x < surface_width and -height < dest_y < surface_height:
+                blit_sequence_append((tile.img, (dest_x, dest_y)))
+        # we only render the tiles that are visible in the screen (camera culling), not all of them, so the cost of
+        # rendering depends on the size of the screen and not on the size of the map.
         # Calculate the range of x and y tile positions to be rendered based on the camera offset and surface dimensions
-        # Compute the starting x tile position based on the camera position
-        x_start = offset[0] // self.tile_size
-        # Compute the ending x tile position based on the camera position and surface width
-        x_end = (offset[0] + surface.get_width()) // self.tile_size + 1
-
-        # Compute the starting y tile position based on the camera position
-        y_start = offset[1] // self.tile_size
-        # Compute the ending y tile position based on the camera position and surface height
-        y_end = (offset[1] + surface.get_height()) // self.tile_size + 1
-        # Iterate over the range of x and y tile positions
-        for x in range(x_start, x_end):  # type: ignore
-            for y in range(y_start, y_end):  # type: ignore
-                loc: str = f"{x};{y}"  # Create a string key for the current tile position
-                if loc in self.tilemap:  # Check if the tile exists in the tilemap
-                    tile = self.tilemap[loc]  # Retrieve the tile information from the tilemap
-                    # Calculate the position to draw the tile on the surface
-
-                    # we apply offset negatively to move the things in the opposite direction to the where the camera
-                    # is moving
-                    dest_x = tile["pos"][0] * self.tile_size - offset[0]
-                    dest_y = tile["pos"][1] * self.tile_size - offset[1]
-                    # Get the tile image from the game assets and draw it on the surface
-                    surface.blit(
-                        source=self.game.assets[tile["type"]][tile["variant"]],
-                        dest=(dest_x, dest_y),
-                    )
+        # the camera offset as ints (pixel art, we draw in whole pixels), so the grid range and every destination
+        # below is plain integer math
+        offset_x, offset_y = int(camera_x), int(camera_y)
+        # Compute the starting and ending x and y tile positions based on the camera position and surface size (the
+        # offsets are ints, so a right shift is the same as the floor division when the tile size is a power of two)
+        tile_shift = self.tile_shift
+        if tile_shift is not None:
+            x_start = offset_x >> tile_shift
+            x_end = ((offset_x + surface_width) >> tile_shift) + 1
+            y_start = offset_y >> tile_shift
+            y_end = ((offset_y + surface_height) >> tile_shift) + 1
+        else:
+            x_start = offset_x // self.tile_size
+            x_end = (offset_x + surface_width) // self.tile_size + 1
+            y_start = offset_y // self.tile_size
+            y_end = (offset_y + surface_height) // self.tile_size + 1
+        # bind what the loop uses once, so the inner loop does not look up the attributes for every tile
+        tilemap = self.tilemap
+        columns_get = self.columns.get
+        # Iterate over the range of x tile positions, and only over the tiles of each column that exist and are in the
+        # y range (found with a binary search in the sorted column), empty cells are never visited
+        for x in range(x_start, x_end):
+            column = columns_get(x)
+            if column is None:  # no tiles in this column
+                continue
+            for y in column[bisect_left(column, y_start) : bisect_left(column, y_end)]:
+                # Retrieve the tile information from the tilemap, the index guarantees it exists
+                tile = tilemap[(x, y)]
+                # Calculate the position to draw the tile on the surface, from its precomputed pixel position
+
+                # we apply offset negatively to move the things in the opposite direction to the where the camera
+                # is moving
+                pixel_x, pixel_y = tile.pixel_pos
+                # queue the tile image (resolved when the tile was added) to be drawn on the surface
+                blit_sequence_append((tile.img, (pixel_x - offset_x, pixel_y - offset_y)))
+        self.cached_view = view
+        self.cached_blit_sequence = blit_sequence
+        return blit_sequence
+
+    def render(self, surface: Surface, offset: Vector2D = (0, 0)) -> None:
+        """Render tilemap and offgrid tiles."""
+        # draw everything at once, 0 means no special blending flags
+        surface.fblits(self.blit_sequence(surface=surface, offset=offset), 0)
@@ -8,22 +8,39 @@ from pygame import Surface
 BASE_IMG_PATH = "data/images/"
 
 
-def load_image(path: str, color_key: tuple[int, int, int] = (0, 0, 0)) -> Surface:
-    """Load image in pygame from path.
+def prepare_image(img: Surface, color_key: tuple[int, int, int] | None = (0, 0, 0)) -> Surface:
+    """Prepare a loaded image for fast blitting, color_key None means the image is opaque.
 
     Returns
     -------
-    a Surface with the Image
+    a Surface with the image in the display format
 
     """
     # we use convert to because it creates a more efficient way to
-    # have the image in memory for rendering
-    img: Surface = pygame.image.load(BASE_IMG_PATH + path).convert()
-    # the color to use a background and to put to transparency
-    img.set_colorkey(color_key)  # pure black
+    # have the image in memory for rendering (same pixel format as the display, so blits are a straight copy).
+    # We use convert and not convert_alpha on purpose: our sprites transparency is all or nothing over a black
+    # background, so a color key is enough and color key blits are cheaper than per pixel alpha blending.
+    img = img.convert()
+    # opaque images (like the background) do not need a color key, without it the blit is a straight copy
+    if color_key is not None:
+        # the color to use a background and to put to transparency
+        # RLEACCEL run length encodes the transparent pixels, so when blitting SDL skips them instead of testing each
+        # pixel against the color key.
+        img.set_colorkey(color_key, pygame.RLEACCEL)  # pure black
     return img
 
 
+def load_image(path: str, color_key: tuple[int, int, int] | None = (0, 0, 0)) -> Surface:
+    """Load image in pygame from path, color_key None means the image is opaque.
+
+    Returns
+    -------
+    a Surface with the Image
+
+    """
+    return prepare_image(img=pygame.image.load(BASE_IMG_PATH + path), color_key=color_key)
+
+
 def load_images(path: str) -> list[Surface]:
     """Load all images in a directory.
 
@@ -33,24 +50,43 @@ def load_images(path: str) -> list[Surface]:
 
     """
     # images in folder depend on them being in alphabetical order. For number, we pad with zeros so that the smallest
-    # numbers are always at the begining
-    images: list[Surface] = [load_image(path + "/" + img_name) for img_name in sorted(os.listdir(BASE_IMG_PATH + path))]
-    return images
+    # numbers are always at the begining. All the entries share the directory prefix, so sorting the full paths sorts
+    # by name.
+    # scandir gives us the full path of each entry and its type (from the directory listing, without an extra stat
+    # call), so we skip anything that is not a file and do not join the paths ourselves.
+    with os.scandir(BASE_IMG_PATH + path) as entries:
+        img_paths: list[str] = sorted(entry.path for entry in entries if entry.is_file())
+    return [prepare_image(img=pygame.image.load(img_path)) for img_path in img_paths]
 
 
 # pygame doesn't have a animation object by default
 class Animation:
     """An animation class."""
 
-    def __init__(self, images: list[Surface], image_duration: int = 5, loop: bool = True) -> None:  # noqa: FBT001, FBT002
+    # the game frames elapsed, shared by every animation. The game advances it once per frame with tick_all, instead
+    # of every animation instance counting its own frames with an update call each frame.
+    ticks: int = 0
+
+    def __init__(
+        self,
+        images: list[Surface],
+        image_duration: int = 5,
+        loop: bool = True,  # noqa: FBT001, FBT002
+        flipped_images: list[Surface] | None = None,
+    ) -> None:
         """Init basic animation class."""
         # each image will be displayed the same amount of time, it can be done in other ways.
         self.images = images
+        # our animations only face one way, to face the other way we need the images flipped. We flip them once here
+        # instead of flipping (creating a new surface) the current image every frame when rendering. Copies of the
+        # animation pass the flipped images along, so they are only computed once per animation asset.
+        if flipped_images is None:
+            flipped_images = [pygame.transform.flip(surface=img, flip_x=True, flip_y=False) for img in images]
+        self.flipped_images = flipped_images
         self.image_duration = image_duration
         self.loop = loop
-        # specific to an individual animation
-        self.done: bool = False  # to keep track if the animation has finished
-        self.frame: int = 0  # frame of the game
+        # specific to an individual animation, the shared tick when it started, its frame is how far we are from it
+        self.start_tick: int = Animation.ticks
         self.total_animation_frames: int = self.image_duration * len(self.images)
 
     def copy(self) -> "Animation":
@@ -58,21 +94,42 @@ class Animation:
 
         Returns
         -------
-        a copy of itself. Images are a reference.
+        a copy of itself. Images (and flipped images) are a reference.
 
         """
-        return Animation(self.images, self.image_duration, self.loop)
+        return Animation(self.images, self.image_duration, self.loop, self.flipped_images)
+
+    @classmethod
+    def tick_all(cls) -> None:
+        """Advance every animation one frame."""
+        cls.ticks += 1
+
+    @property
+    def frame(self) -> int:
+        """Frame of the animation, from the game frames elapsed since it started.
+
+        Returns
+        -------
+        the current frame of the animation.
 
-    def update(self) -> None:
-        """Update the animation object."""
+        """
+        elapsed = Animation.ticks - self.start_tick
         if self.loop:
             # goes to the maximum frame per animation and loops around
-            self.frame = (self.frame + 1) % self.total_animation_frames
-        else:
-            # we substract one so that we do not get pass the animation frames
-            self.frame = min(self.frame + 1, self.total_animation_frames - 1)
-            if self.frame >= self.total_animation_frames - 1:
-                self.done = True
+            return elapsed % self.total_animation_frames
+        # we substract one so that we do not get pass the animation frames
+        return min(elapsed, self.total_animation_frames - 1)
+
+    @property
+    def done(self) -> bool:
+        """Whether a non looping animation has finished.
+
+        Returns
+        -------
+        True if the animation does not loop and reached its last frame.
+
+        """
+        return not self.loop and Animation.ticks - self.start_tick >= self.total_animation_frames - 1
 
     def img(self) -> Surface:
         """Get animation image.
@@ -82,4 +139,16 @@ class Animation:
         Surface with the current image of the animation.
 
         """
-        return self.images[int(self.frame / self.image_duration)]
+        # frame and image duration are ints, integer division gives the index directly, without a float division
+        # and a conversion back to an int
+        return self.images[self.frame // self.image_duration]
+
+    def img_flipped(self) -> Surface:
+        """Get animation image mirrored horizontally.
+
+        Returns
+        -------
+        Surface with the current image of the animation, flipped.
+
+        """
+        return self.flipped_images[self.frame // self.image_duration]